@@ -0,0 +1,250 @@
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import sys
+
+import evaluator
+import simulation
+import tables
+import tkpoker as pkr
+
+
+# Batch evaluator for shell pipelines: reads one hand per line from a file
+# or stdin and writes one result line per input line, in input order.
+#
+#     python cli.py evaluate [FILE]     cards (5 to 7)            -> KEY RANKING
+#     python cli.py showdown [FILE]     board | hand | hand ...   -> KEY KEY ... WINNERS
+#     python cli.py equity [FILE]       board | hand | hand ...   -> EQUITY EQUITY ...
+#
+# Cards are written like Card.short(), with or without brackets or spaces:
+# '[As][Kd]', 'AsKd' and 'As Kd' are the same. KEY is the strength key
+# (see Holding.key()), RANKING the Ranking value, WINNERS the comma
+# separated player numbers sharing the pot. A board may be left empty for
+# equity ('| AsAd | KhKs').
+#
+# Equity is exact when there are at most --exact runouts to enumerate,
+# otherwise it is estimated from --samples random runouts.
+#
+# Empty input lines give empty output lines; a line that can't be read
+# gives 'ERROR <reason>', so the output always lines up with the input.
+
+_CARD_IDS = dict()
+for _card in pkr.CARDS:
+    _rank = _card.rank.short()
+    _suit = _card.suit.short()
+    for _r in (_rank, _rank.lower()):
+        for _s in (_suit, _suit.upper()):
+            _CARD_IDS[_r + _s] = _card.id()
+del _card, _rank, _suit, _r, _s
+
+
+def _parse_ids(text):
+    text = ''.join(text.replace('[', '').replace(']', '').split())
+    if len(text) % 2 != 0:
+        raise ValueError(f'not a list of cards: {text!r}')
+    ids = []
+    for i in range(0, len(text), 2):
+        card_id = _CARD_IDS.get(text[i:i+2])
+        if card_id is None:
+            raise ValueError(f'not a card: {text[i:i+2]!r}')
+        ids.append(card_id)
+    return ids
+
+
+# (board ids, [hand ids, ...]) of 'board | hand | hand ...'
+def _parse_showdown(line):
+    parts = line.split('|')
+    if len(parts) < 3:
+        raise ValueError('expected: board | hand | hand ...')
+    board = _parse_ids(parts[0])
+    hands = [_parse_ids(part) for part in parts[1:]]
+    for hand in hands:
+        if len(hand) != 2:
+            raise ValueError(f'a hand has 2 cards, not {len(hand)}')
+    if len(board) > 5:
+        raise ValueError(f'a board has at most 5 cards, not {len(board)}')
+    _check_duplicates(board + [c for hand in hands for c in hand])
+    return board, hands
+
+
+def _check_duplicates(ids):
+    if len(set(ids)) != len(ids):
+        raise ValueError('a card is used more than once')
+
+
+def _winners_string(keys):
+    best = max(keys)
+    return ','.join(str(p + 1) for p, key in enumerate(keys) if key == best)
+
+
+def evaluate_line(line, options, number):
+    ids = _parse_ids(line)
+    if len(ids) < 5 or len(ids) > 7:
+        raise ValueError(f'a hand has 5 to 7 cards, not {len(ids)}')
+    _check_duplicates(ids)
+    key = evaluator.evaluate(ids)
+    return f'{key} {key >> 20}'
+
+
+def showdown_line(line, options, number):
+    board, hands = _parse_showdown(line)
+    if len(board) != 5:
+        raise ValueError(f'a showdown needs a board of 5 cards, not {len(board)}')
+    keys = [evaluator.evaluate(hand + board) for hand in hands]
+    return ' '.join(str(key) for key in keys) + ' ' + _winners_string(keys)
+
+
+def equity_line(line, options, number):
+    board, hands = _parse_showdown(line)
+
+    # a generator per line, so the samples don't depend on the batches or
+    # the number of processes
+    if options.seed is None:
+        rng = random.Random()
+    else:
+        rng = random.Random(f'{options.seed}:{number}')
+
+    used = set(board)
+    for hand in hands:
+        used.update(hand)
+    deck = [c for c in range(len(pkr.CARDS)) if c not in used]
+    missing = 5 - len(board)
+    if len(deck) < missing:
+        raise ValueError(f'{len(deck)} cards left, the board needs {missing}')
+
+    if math.comb(len(deck), missing) <= options.exact:
+        runouts = itertools.combinations(deck, missing)
+    else:
+        runouts = (rng.sample(deck, missing) for i in range(options.samples))
+
+    evaluate = evaluator.evaluate
+    shares = [0.0] * len(hands)
+    total = 0
+    for runout in runouts:
+        full_board = board + list(runout)
+        keys = [evaluate(hand + full_board) for hand in hands]
+        best = max(keys)
+        winners = [p for p, key in enumerate(keys) if key == best]
+        for p in winners:
+            shares[p] += 1 / len(winners)
+        total += 1
+
+    return ' '.join(f'{share / total:.6f}' for share in shares)
+
+
+_COMMANDS = {
+    'evaluate': evaluate_line,
+    'showdown': showdown_line,
+    'equity': equity_line,
+}
+
+
+# turns a batch (number of its first line, lines) into one block of output;
+# picklable, so batches can go to worker processes
+class _Batch:
+    def __init__(self, command, options):
+        self.command = command
+        self.options = options
+
+    def __call__(self, batch):
+        start, lines = batch
+        function = _COMMANDS[self.command]
+        output = []
+        for number, line in enumerate(lines, start):
+            line = line.strip()
+            if line == '':
+                output.append('')
+                continue
+            try:
+                output.append(function(line, self.options, number))
+            except ValueError as e:
+                output.append(f'ERROR {e}')
+        output.append('')
+        return '\n'.join(output)
+
+
+def _batches(lines, batch_size):
+    start = 0
+    while True:
+        batch = list(itertools.islice(lines, batch_size))
+        if len(batch) == 0:
+            return
+        yield start, batch
+        start += len(batch)
+
+
+def run(command, lines, output, options):
+    batches = _batches(iter(lines), options.batch_size)
+    work = _Batch(command, options)
+
+    if options.processes > 1:
+        # load the lookup tables before forking, so the workers share them
+        tables.warm()
+        with multiprocessing.Pool(options.processes) as pool:
+            # at most 2 blocks per process waiting for a slow reader
+            for block in simulation.bounded_imap(pool, work, batches, 2 * options.processes):
+                output.write(block)
+    else:
+        for batch in batches:
+            output.write(work(batch))
+
+
+# argparse type for counts of at least 1
+def _positive(text):
+    import argparse
+
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'must be at least 1, not {value}')
+    return value
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='cli.py', description='Evaluate poker hands in bulk, one per line.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    helps = {
+        'evaluate': 'strength key and Ranking of 5 to 7 cards',
+        'showdown': 'keys and winners of hands on a full board',
+        'equity': 'all-in equity of hands on a board of 0 to 5 cards',
+    }
+    for command, text in helps.items():
+        command_parser = commands.add_parser(command, help=text)
+        command_parser.add_argument('file', nargs='?', default='-', help='input file (default: stdin)')
+        command_parser.add_argument('-j', '--processes', type=_positive, default=1)
+        command_parser.add_argument('--batch-size', type=_positive, default=10000, help='lines per batch')
+        if command == 'equity':
+            command_parser.add_argument('--exact', type=_positive, default=50000,
+                                        help='enumerate all runouts up to this many (default: 50000)')
+            command_parser.add_argument('--samples', type=_positive, default=100000,
+                                        help='random runouts otherwise (default: 100000)')
+            command_parser.add_argument('--seed', type=int, default=None)
+
+    options = parser.parse_args(argv)
+
+    if options.file == '-':
+        lines = sys.stdin
+    else:
+        try:
+            lines = open(options.file)
+        except OSError as e:
+            parser.error(f"can't open {options.file}: {e.strerror}")
+
+    try:
+        run(options.command, lines, sys.stdout, options)
+    except BrokenPipeError:
+        # the reader (e.g. head) stopped early: silence the final flush of stdout
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+if __name__ == "__main__":
+    main()
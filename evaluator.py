@@ -0,0 +1,153 @@
+import tables
+import tkpoker as pkr
+
+
+# Table-backed hand evaluator working on card ids (see Card.id()).
+#
+# evaluate() returns the same strength key as Holding.key() after
+# Holding.define() for hands of 5 to 7 cards, without creating any objects
+# besides the key itself.
+#
+# Ranks are handled as 13-bit masks: bit Rank.value - 1, so the Ace is bit 0.
+# Packed ranks are (ace high) rank values of 4 bits each, highest first,
+# left-aligned in 20 bits, like the low bits of a strength key.
+
+_RANKS = len(pkr.Rank)
+
+_ROYAL_FLUSH = pkr.Ranking.ROYAL_FLUSH.value << 20
+_STRAIGHT_FLUSH = pkr.Ranking.STRAIGHT_FLUSH.value << 20
+_FOUR_OF_A_KIND = pkr.Ranking.FOUR_OF_A_KIND.value << 20
+_FULL_HOUSE = pkr.Ranking.FULL_HOUSE.value << 20
+_FLUSH = pkr.Ranking.FLUSH.value << 20
+_STRAIGHT = pkr.Ranking.STRAIGHT.value << 20
+_THREE_OF_A_KIND = pkr.Ranking.THREE_OF_A_KIND.value << 20
+_TWO_PAIR = pkr.Ranking.TWO_PAIR.value << 20
+_PAIR = pkr.Ranking.PAIR.value << 20
+_HIGH_CARD = pkr.Ranking.HIGH_CARD.value << 20
+
+
+def _value(bit):
+    if bit == 0:
+        return 14
+    else:
+        return bit + 1
+
+
+# the 5 highest ranks of every rank mask, packed
+def _build_top_ranks():
+    for mask in range(1 << _RANKS):
+        values = sorted((_value(b) for b in range(_RANKS) if mask >> b & 1), reverse=True)
+        packed = 0
+        for i, value in enumerate(values[:5]):
+            packed |= value << (16 - 4 * i)
+        yield packed
+
+
+# the highest straight of every rank mask, packed, or 0 if there is none.
+# Like get_straightcards(), the wheel is packed as 5, 4, 3, 2, Ace.
+def _build_straights():
+    for mask in range(1 << _RANKS):
+        # copy the Ace to bit 13, so it can be high as well
+        mask |= (mask & 1) << 13
+        packed = 0
+        for high in range(14, 4, -1):
+            window = 0b11111 << (high - 5)
+            if mask & window == window:
+                for value in range(high, high - 5, -1):
+                    packed = packed << 4 | (14 if value == 1 else value)
+                break
+        yield packed
+
+
+TOP_RANKS = tables.LazyTable('top_ranks', 1, 'I', _build_top_ranks)
+STRAIGHTS = tables.LazyTable('straights', 1, 'I', _build_straights)
+
+
+# strength key of a hand of card ids
+def evaluate(card_ids):
+    counts = [0] * _RANKS
+    suit_masks = [0, 0, 0, 0]
+    suit_counts = [0, 0, 0, 0]
+    for i in card_ids:
+        r = i % _RANKS
+        s = i // _RANKS
+        counts[r] += 1
+        suit_masks[s] |= 1 << r
+        suit_counts[s] += 1
+
+    return evaluate_counts(counts, suit_masks, suit_counts)
+
+
+# strength key from the rank counts (index: Rank.value - 1), the rank mask of
+# every suit and the number of cards of every suit
+def evaluate_counts(counts, suit_masks, suit_counts):
+    top = TOP_RANKS.get()
+    straights = STRAIGHTS.get()
+
+    flush = 0
+    for s in range(4):
+        if suit_counts[s] >= 5:
+            flush = suit_masks[s]
+    if flush:
+        straight = straights[flush]
+        if straight:
+            if straight >> 16 == 14:
+                return _ROYAL_FLUSH | straight
+            else:
+                return _STRAIGHT_FLUSH | straight
+
+    singles = pairs = threes = fours = 0
+    for r in range(_RANKS):
+        n = counts[r]
+        if n == 1:
+            singles |= 1 << r
+        elif n == 2:
+            pairs |= 1 << r
+        elif n == 3:
+            threes |= 1 << r
+        elif n == 4:
+            fours |= 1 << r
+
+    if fours:
+        q = top[fours] >> 16
+        bit = 0 if q == 14 else q - 1
+        kicker = top[(singles | pairs | threes | fours) & ~(1 << bit)] >> 16
+        return _FOUR_OF_A_KIND | q << 16 | q << 12 | q << 8 | q << 4 | kicker
+
+    if threes:
+        t = top[threes]
+        three = t >> 16
+        # a second three of a kind makes the full house, before any pair
+        second = t >> 12 & 15
+        if not second and pairs:
+            second = top[pairs] >> 16
+        if second:
+            return _FULL_HOUSE | three << 16 | three << 12 | three << 8 | second << 4 | second
+
+    if flush:
+        return _FLUSH | top[flush]
+
+    straight = straights[singles | pairs | threes | fours]
+    if straight:
+        return _STRAIGHT | straight
+
+    if threes:
+        return _THREE_OF_A_KIND | three << 16 | three << 12 | three << 8 | top[singles] >> 12
+
+    if pairs:
+        p = top[pairs]
+        high = p >> 16
+        low = p >> 12 & 15
+        if low:
+            # the kicker is the highest other rank, a third pair as well
+            high_bit = 1 << (0 if high == 14 else high - 1)
+            low_bit = 1 << (low - 1)
+            kicker = top[(singles | pairs) & ~(high_bit | low_bit)] >> 16
+            return _TWO_PAIR | high << 16 | high << 12 | low << 8 | low << 4 | kicker
+        return _PAIR | high << 16 | high << 12 | top[singles] >> 8
+
+    return _HIGH_CARD | top[singles]
+
+
+def evaluate_cards(cards):
+    return evaluate([card.id() for card in cards])
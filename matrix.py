@@ -0,0 +1,389 @@
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import sys
+
+import evaluator
+import tables
+import tkpoker as pkr
+
+
+# Exact all-in preflop equity of every pair of Hole_Cards.generic() classes.
+#
+# The work is split into units, one per suit-overlap variant of a pair of
+# classes: the first class is fixed to one combo, and the combos of the
+# second class that are the same up to a swap of suits are one variant,
+# weighted by their number of combos. A unit enumerates all 1,712,304
+# boards of its variant.
+#
+# The units are spread over shards that share a directory, so they can run
+# in separate processes or on separate machines:
+#
+#     python matrix.py plan DIR --shards 64     write DIR/plan.json
+#     python matrix.py run DIR [SHARD ...]      compute shards (default: claim
+#                                               the shards nobody claimed yet)
+#     python matrix.py run DIR --resume [...]   take over the claims of others too
+#     python matrix.py status DIR               progress of every shard
+#     python matrix.py merge DIR OUT.csv        combine into the matrix
+#
+# A shard appends every finished unit to DIR/shard-NNNN.csv, so an
+# interrupted shard continues where it stopped when it is run again.
+# A running shard holds a DIR/shard-NNNN.lock file with the host name and
+# process id, removed when it stops. The lock of a crashed process on the
+# same host is taken over by the next run; the lock of a dead machine only
+# with --resume.
+
+# version 2: evaluator fix for the two pair kicker with three pairs
+VERSION = 2
+
+_BOARDS = 1712304   # 48 choose 5
+_PERMUTATIONS = list(itertools.permutations(range(len(pkr.Suit))))
+
+
+def _permute(card_id, permutation):
+    return permutation[card_id // len(pkr.Rank)] * len(pkr.Rank) + card_id % len(pkr.Rank)
+
+
+def _combo_ids(generic):
+    return [tuple(card.id() for card in combo) for combo in pkr.get_generic_combos(generic)]
+
+
+# The suit-overlap variants of a pair of classes: a list of
+# (hero, villain, weight), with hero the first combo of the first class and
+# villain a representative of weight combos of the second class.
+def get_variants(generic1, generic2):
+    hero = _combo_ids(generic1)[0]
+
+    # the suit swaps that leave the hero combo as it is
+    stabilizer = [p for p in _PERMUTATIONS
+                  if sorted(_permute(c, p) for c in hero) == sorted(hero)]
+
+    variants = dict()
+    for villain in _combo_ids(generic2):
+        if villain[0] in hero or villain[1] in hero:
+            continue
+        key = min(tuple(sorted(_permute(c, p) for c in villain)) for p in stabilizer)
+        if key in variants:
+            variants[key][1] += 1
+        else:
+            variants[key] = [villain, 1]
+
+    return [(hero, villain, weight) for key, (villain, weight) in sorted(variants.items())]
+
+
+# all units in a fixed order: (class index 1, class index 2, hero, villain, weight)
+def get_units():
+    generics = pkr.get_generic_classes()
+    units = []
+    for i in range(len(generics)):
+        for j in range(i, len(generics)):
+            for hero, villain, weight in get_variants(generics[i], generics[j]):
+                units.append((i, j, hero, villain, weight))
+    return units
+
+
+# exact (wins, ties, losses) of hero against villain over all boards
+def get_equity(hero, villain):
+    evaluate = evaluator.evaluate
+    hero = list(hero)
+    villain = list(villain)
+    deck = [c for c in range(len(pkr.CARDS)) if c not in hero and c not in villain]
+
+    wins = ties = 0
+    for board in itertools.combinations(deck, 5):
+        board = list(board)
+        hero_key = evaluate(hero + board)
+        villain_key = evaluate(villain + board)
+        if hero_key > villain_key:
+            wins += 1
+        elif hero_key == villain_key:
+            ties += 1
+
+    return wins, ties, _BOARDS - wins - ties
+
+
+def _compute(unit):
+    index, (i, j, hero, villain, weight) = unit
+    return (index,) + get_equity(hero, villain)
+
+
+def _ids_string(ids):
+    return pkr.get_cards_string(pkr.card_from_id(c) for c in ids)
+
+
+def _plan_path(directory):
+    return os.path.join(directory, 'plan.json')
+
+
+def _shard_path(directory, shard, extension):
+    return os.path.join(directory, f'shard-{shard:04d}.{extension}')
+
+
+def plan(directory, shards):
+    os.makedirs(directory, exist_ok=True)
+    path = _plan_path(directory)
+    if os.path.exists(path):
+        raise ValueError(f'{path} already exists')
+    with open(path, 'w') as f:
+        json.dump({'version': VERSION, 'shards': shards, 'units': len(get_units())}, f)
+
+
+def read_plan(directory):
+    with open(_plan_path(directory)) as f:
+        plan = json.load(f)
+    if plan['version'] != VERSION:
+        raise ValueError(f'{directory} was planned with version {plan["version"]}, expected {VERSION}')
+    return plan
+
+
+# the units of a shard: every shards-th unit, so all shards get a similar mix
+def get_shard_units(units, shards, shard):
+    return [(index, units[index]) for index in range(shard, len(units), shards)]
+
+
+# the finished results of a shard file, by unit index.
+# A partly written last line (the shard was killed) is ignored, or cut off
+# with repair=True; only the process running the shard should repair it.
+def read_shard(path, repair=False):
+    results = dict()
+    try:
+        f = open(path, 'r+' if repair else 'r')
+    except FileNotFoundError:
+        return results
+
+    with f:
+        good = 0
+        for line in f:
+            fields = line.rstrip('\n').split(',')
+            if not line.endswith('\n') or len(fields) != 7:
+                break
+            index, hero, villain, weight, wins, ties, losses = fields
+            results[int(index)] = (int(weight), int(wins), int(ties), int(losses))
+            good += len(line.encode())
+        if repair:
+            f.truncate(good)
+
+    return results
+
+
+def _lock_owner():
+    return f'{socket.gethostname()} {os.getpid()}'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# host name and process id in the lock of a shard, None if it isn't claimed
+def get_lock_owner(directory, shard):
+    try:
+        with open(_shard_path(directory, shard, 'lock')) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+# whether the process holding a lock is gone: only known for this host
+def _stale(owner):
+    try:
+        host, pid = owner.split()
+        pid = int(pid)
+    except ValueError:
+        # still being written, or garbage: leave it to resume=True
+        return False
+    return host == socket.gethostname() and (pid == os.getpid() or not _alive(pid))
+
+
+# Try to claim a shard for this process, False if another process has it.
+# The lock of a dead process on this host is taken over, with resume=True
+# any lock.
+def claim(directory, shard, resume=False):
+    path = _shard_path(directory, shard, 'lock')
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        owner = get_lock_owner(directory, shard)
+        if owner is None:
+            # released in the meantime
+            return claim(directory, shard, resume)
+        if not resume and not _stale(owner):
+            return False
+        # write a new lock and move it over the old one in one step
+        temp = f'{path}.{os.getpid()}.tmp'
+        with open(temp, 'w') as f:
+            f.write(_lock_owner() + '\n')
+        os.replace(temp, path)
+        return True
+
+    with os.fdopen(fd, 'w') as f:
+        f.write(_lock_owner() + '\n')
+    return True
+
+
+# remove the lock of a shard, if this process holds it
+def release(directory, shard):
+    if get_lock_owner(directory, shard) == _lock_owner():
+        os.remove(_shard_path(directory, shard, 'lock'))
+
+
+# units: get_units(), when the caller has it already
+def run_shard(directory, shard, processes=None, units=None):
+    plan = read_plan(directory)
+    if units is None:
+        units = get_units()
+    if len(units) != plan['units']:
+        raise ValueError(f'{directory} was planned for {plan["units"]} units, found {len(units)}')
+
+    path = _shard_path(directory, shard, 'csv')
+    done = read_shard(path, repair=True)
+    todo = [unit for unit in get_shard_units(units, plan['shards'], shard) if unit[0] not in done]
+    if len(todo) == 0:
+        return
+
+    tables.warm()
+    with open(path, 'a') as f:
+        def checkpoint(result):
+            index, wins, ties, losses = result
+            i, j, hero, villain, weight = units[index]
+            f.write(f'{index},{_ids_string(hero)},{_ids_string(villain)},{weight},{wins},{ties},{losses}\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if processes > 1:
+            with multiprocessing.Pool(processes) as pool:
+                for result in pool.imap_unordered(_compute, todo):
+                    checkpoint(result)
+        else:
+            for unit in todo:
+                checkpoint(_compute(unit))
+
+
+# Claim and run the given shards, or all shards by default. Shards that
+# another live process holds are skipped, with a message for the ones asked
+# for by number.
+def run(directory, shards=None, processes=None, resume=False):
+    named = bool(shards)
+    if not named:
+        shards = range(read_plan(directory)['shards'])
+    units = get_units()
+    for shard in shards:
+        if not claim(directory, shard, resume):
+            if named:
+                owner = get_lock_owner(directory, shard)
+                print(f'shard {shard} is claimed by {owner}, skipped (take it over with --resume)', file=sys.stderr)
+            continue
+        try:
+            run_shard(directory, shard, processes, units)
+        finally:
+            release(directory, shard)
+
+
+# (finished, total) units of every shard
+def status(directory):
+    plan = read_plan(directory)
+    total = plan['units']
+    progress = []
+    for shard in range(plan['shards']):
+        finished = len(read_shard(_shard_path(directory, shard, 'csv')))
+        progress.append((finished, len(range(shard, total, plan['shards']))))
+    return progress
+
+
+# The 169x169 matrix: the equity (ties count half) of the row class against
+# the column class, from the results of all shards
+def merge(directory):
+    plan = read_plan(directory)
+    units = get_units()
+
+    results = dict()
+    for shard in range(plan['shards']):
+        results.update(read_shard(_shard_path(directory, shard, 'csv')))
+    missing = len(units) - len(results)
+    if missing:
+        raise ValueError(f'{missing} of {len(units)} units are not finished yet')
+
+    n = len(pkr.get_generic_classes())
+    points = [[0] * n for i in range(n)]
+    boards = [[0] * n for i in range(n)]
+    for index, (i, j, hero, villain, weight) in enumerate(units):
+        weight, wins, ties, losses = results[index]
+        # in points, so ties (1 point) stay exact integers
+        points[i][j] += weight * (2 * wins + ties)
+        points[j][i] += weight * (2 * losses + ties)
+        boards[i][j] += weight * (wins + ties + losses)
+        boards[j][i] += weight * (wins + ties + losses)
+
+    return [[points[i][j] / (2 * boards[i][j]) for j in range(n)] for i in range(n)]
+
+
+def write_matrix(path, matrix):
+    generics = pkr.get_generic_classes()
+    with open(path, 'w') as f:
+        f.write(',' + ','.join(generics) + '\n')
+        for generic, row in zip(generics, matrix):
+            f.write(generic + ',' + ','.join(f'{equity:.6f}' for equity in row) + '\n')
+
+
+# the matrix as a dictionary of dictionaries: equity[row class][column class]
+def read_matrix(path):
+    with open(path) as f:
+        generics = f.readline().rstrip('\n').split(',')[1:]
+        matrix = dict()
+        for line in f:
+            fields = line.rstrip('\n').split(',')
+            matrix[fields[0]] = dict(zip(generics, (float(x) for x in fields[1:])))
+    return matrix
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='matrix.py', description='Compute the 169x169 preflop equity matrix.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan_parser = commands.add_parser('plan', help='split the work into shards')
+    plan_parser.add_argument('directory')
+    plan_parser.add_argument('--shards', type=int, default=64)
+
+    run_parser = commands.add_parser('run', help='compute shards')
+    run_parser.add_argument('directory')
+    run_parser.add_argument('shards', type=int, nargs='*', help='shards to run (default: claim free shards)')
+    run_parser.add_argument('--processes', type=int, default=None, help='default: one per core')
+    run_parser.add_argument('--resume', action='store_true', help='take over shards claimed by other processes')
+
+    status_parser = commands.add_parser('status', help='show the progress of the shards')
+    status_parser.add_argument('directory')
+
+    merge_parser = commands.add_parser('merge', help='merge the shards into the matrix')
+    merge_parser.add_argument('directory')
+    merge_parser.add_argument('output')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'plan':
+        plan(args.directory, args.shards)
+    elif args.command == 'run':
+        run(args.directory, args.shards, args.processes, args.resume)
+    elif args.command == 'status':
+        finished = total = 0
+        for shard, (done, units) in enumerate(status(args.directory)):
+            print(f'shard {shard:4d}: {done}/{units}')
+            finished += done
+            total += units
+        print(f'total: {finished}/{total}')
+    elif args.command == 'merge':
+        write_matrix(args.output, merge(args.directory))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
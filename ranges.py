@@ -0,0 +1,288 @@
+import array
+
+import tkpoker as pkr
+
+
+# Hand ranges in the usual notation, compiled to sets of the 1326 combos.
+#
+#     parse_range('TT+, AKs, KQo, A2s-A5s, 76s:0.5, AsKd')
+#
+# Entries are separated by commas:
+#     77, AKs, AKo, AK        a class (AK is both AKs and AKo), brackets
+#                             like Hole_Cards.generic() are fine too: [AKs]
+#     TT+, A2s+, KTo+         the class and the better ones with the same
+#                             high card (pairs: up to AA)
+#     22-55, A2s-A5s          every class in between, both included
+#     AsKd                    one combo
+#     entry:0.5               the entry with a weight (default 1, 0 removes)
+#
+# A combo is a pair of card ids (see Card.id()), lowest first, and has an
+# index 0..1325. A Range keeps its combos as a 1326-bit integer, so set
+# operations are single integer operations. Weights, when there are any,
+# are an array of 1326 doubles next to it.
+
+COMBOS = []
+_INDEX = [[None] * len(pkr.CARDS) for c in pkr.CARDS]
+for _a in range(len(pkr.CARDS)):
+    for _b in range(_a + 1, len(pkr.CARDS)):
+        _INDEX[_a][_b] = _INDEX[_b][_a] = len(COMBOS)
+        COMBOS.append((_a, _b))
+del _a, _b
+
+ALL = (1 << len(COMBOS)) - 1
+
+# per card id: the combos holding that card
+_CARD_BITS = [0] * len(pkr.CARDS)
+for _i, (_a, _b) in enumerate(COMBOS):
+    _CARD_BITS[_a] |= 1 << _i
+    _CARD_BITS[_b] |= 1 << _i
+del _i, _a, _b
+
+_SUITS = ''.join(s.short() for s in pkr.Suit)
+
+_generic_bits = dict()
+
+
+def get_combo_index(card1, card2):
+    return _INDEX[card1.id()][card2.id()]
+
+
+def get_combo(index):
+    a, b = COMBOS[index]
+    return [pkr.card_from_id(a), pkr.card_from_id(b)]
+
+
+# bits of the combos holding any of the cards
+def get_dead_bits(cards):
+    bits = 0
+    for card in cards:
+        bits |= _CARD_BITS[card.id()]
+    return bits
+
+
+# bits of the combos of a Hole_Cards.generic() string
+def get_generic_bits(generic):
+    bits = _generic_bits.get(generic)
+    if bits is None:
+        bits = 0
+        for card1, card2 in pkr.get_generic_combos(generic):
+            bits |= 1 << get_combo_index(card1, card2)
+        _generic_bits[generic] = bits
+    return bits
+
+
+def _indices(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class Range:
+    def __init__(self, bits=0, weights=None):
+        self.bits = bits
+        # None: every combo weighs 1. Entries of combos not in bits don't count.
+        self.weights = weights
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __contains__(self, combo):
+        card1, card2 = combo
+        return self.bits >> get_combo_index(card1, card2) & 1 == 1
+
+    def __iter__(self):
+        for index in _indices(self.bits):
+            yield get_combo(index)
+
+    # combo indices, lowest first
+    def indices(self):
+        return list(_indices(self.bits))
+
+    def weight(self, index):
+        if not self.bits >> index & 1:
+            return 0.0
+        elif self.weights is None:
+            return 1.0
+        else:
+            return self.weights[index]
+
+    def total_weight(self):
+        if self.weights is None:
+            return float(len(self))
+        return sum(self.weights[i] for i in _indices(self.bits))
+
+    # self == other
+    def __eq__(self, other):
+        if self.bits != other.bits:
+            return False
+        if self.weights is None and other.weights is None:
+            return True
+        return all(self.weight(i) == other.weight(i) for i in _indices(self.bits))
+
+    # self | other: the combos of both, with the highest weight
+    def __or__(self, other):
+        bits = self.bits | other.bits
+        if self.weights is None and other.weights is None:
+            return Range(bits)
+        return _weighted(bits, lambda i: max(self.weight(i), other.weight(i)))
+
+    # self & other: the combos in both, with the lowest weight
+    def __and__(self, other):
+        bits = self.bits & other.bits
+        if self.weights is None and other.weights is None:
+            return Range(bits)
+        return _weighted(bits, lambda i: min(self.weight(i), other.weight(i)))
+
+    # self - other: the combos of self that are not in other
+    def __sub__(self, other):
+        return Range(self.bits & ~other.bits, self.weights)
+
+    # the range without the combos holding any of the (dead) cards
+    def remove(self, cards):
+        return Range(self.bits & ~get_dead_bits(cards), self.weights)
+
+    def __str__(self):
+        entries = []
+        for generic in pkr.get_generic_classes():
+            bits = get_generic_bits(generic)
+            if self.bits & bits == 0:
+                continue
+            weights = set(self.weight(i) for i in _indices(bits))
+            if self.bits & bits == bits and len(weights) == 1:
+                entries.append(_entry(generic.strip('[]'), weights.pop()))
+            else:
+                for i in _indices(self.bits & bits):
+                    card1, card2 = sorted(get_combo(i), reverse=True)
+                    entries.append(_entry(pkr.get_cards_string([card1, card2]).replace('[', '').replace(']', ''), self.weight(i)))
+        return ', '.join(entries)
+
+    def __repr__(self):
+        return f'Range({str(self)!r})'
+
+
+def _entry(text, weight):
+    if weight == 1.0:
+        return text
+    return f'{text}:{weight:g}'
+
+
+def _weighted(bits, weight):
+    weights = array.array('d', [0.0]) * len(COMBOS)
+    for i in _indices(bits):
+        weights[i] = weight(i)
+    return _normalized(bits, weights)
+
+
+# drop the weights if they are all 1, and the combos of weight 0
+def _normalized(bits, weights):
+    uniform = True
+    for i in _indices(bits):
+        if weights[i] == 0.0:
+            bits &= ~(1 << i)
+        elif weights[i] != 1.0:
+            uniform = False
+    if uniform:
+        weights = None
+    return Range(bits, weights)
+
+
+# (high Rank, low Rank, suffix) of a class like 'AKs', '77' or 'AK'
+def _parse_class(text):
+    if len(text) not in (2, 3):
+        raise ValueError(f'not a hand class: {text!r}')
+    rank1 = pkr.get_rank(text[0])
+    rank2 = pkr.get_rank(text[1])
+    suffix = text[2:].lower()
+    if rank1.high() < rank2.high():
+        rank1, rank2 = rank2, rank1
+    if rank1 == rank2 and suffix != '':
+        raise ValueError(f'a pair is neither suited nor offsuit: {text!r}')
+    if suffix not in ('', 's', 'o'):
+        raise ValueError(f'not a hand class: {text!r}')
+    return rank1, rank2, suffix
+
+
+def _class_bits(high, low, suffix):
+    if high == low:
+        return get_generic_bits('[' + high.short() + low.short() + ']')
+    bits = 0
+    for s in (suffix,) if suffix else ('s', 'o'):
+        bits |= get_generic_bits('[' + high.short() + low.short() + s + ']')
+    return bits
+
+
+def _rank_values(low, high):
+    return [r for r in pkr.Rank if low <= r.high() <= high]
+
+
+def _entry_bits(text):
+    # one combo, like AsKd
+    if len(text) == 4 and text[1].lower() in _SUITS and text[3].lower() in _SUITS:
+        card1, card2 = pkr.get_cards(text)
+        if card1 is card2:
+            raise ValueError(f'not a combo: {text!r}')
+        return 1 << get_combo_index(card1, card2)
+
+    if '-' in text:
+        first, last = (_parse_class(part.strip()) for part in text.split('-', 1))
+        if first[0] == first[1] and last[0] == last[1]:
+            values = sorted((first[0].high(), last[0].high()))
+            ranks = [(r, r) for r in _rank_values(*values)]
+        elif first[0] == last[0] and first[2] == last[2] and first[0] != first[1] and last[0] != last[1]:
+            values = sorted((first[1].high(), last[1].high()))
+            ranks = [(first[0], r) for r in _rank_values(*values)]
+        else:
+            raise ValueError(f'not a hand class range: {text!r}')
+        suffix = first[2]
+
+    elif text.endswith('+'):
+        high, low, suffix = _parse_class(text[:-1])
+        if high == low:
+            ranks = [(r, r) for r in _rank_values(high.high(), 14)]
+        else:
+            ranks = [(high, r) for r in _rank_values(low.high(), high.high() - 1)]
+
+    else:
+        high, low, suffix = _parse_class(text)
+        ranks = [(high, low)]
+
+    bits = 0
+    for high, low in ranks:
+        bits |= _class_bits(high, low, suffix)
+    return bits
+
+
+def parse_range(text):
+    bits = 0
+    weights = None
+
+    for entry in text.split(','):
+        entry = entry.strip().replace('[', '').replace(']', '')
+        if entry == '':
+            continue
+        weight = 1.0
+        if ':' in entry:
+            entry, weight = entry.split(':', 1)
+            entry = entry.strip()
+            weight = float(weight)
+            if not 0.0 <= weight <= 1.0:
+                raise ValueError(f'weight must be between 0 and 1: {weight}')
+
+        entry_bits = _entry_bits(entry)
+        if weight == 0.0:
+            bits &= ~entry_bits
+            continue
+        if weight != 1.0 and weights is None:
+            weights = array.array('d', [1.0]) * len(COMBOS)
+        if weights is not None:
+            for i in _indices(entry_bits):
+                weights[i] = weight
+        bits |= entry_bits
+
+    if weights is None:
+        return Range(bits)
+    return _normalized(bits, weights)
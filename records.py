@@ -0,0 +1,165 @@
+import mmap
+import struct
+
+import tkpoker as pkr
+
+
+# Binary file of evaluated deals, as produced by simulation.Evaluator.
+#
+# The file starts with a 16 byte header:
+#     magic 'TKPR', format version (u8), number of players (u8),
+#     record size in bytes (u16), 8 reserved bytes
+# followed by fixed-size little-endian records, one per deal:
+#     one byte per card id (two hole cards per player, then the board),
+#     per player the strength key (u32) and its Ranking value (u8),
+#     the winners as a bitmask of players (u8, bit 0 is player 1)
+# A heads-up record is 20 bytes.
+#
+# The number of records follows from the file size, so a file that was cut
+# short only loses its last (partial) record.
+
+MAGIC = b'TKPR'
+VERSION = 1
+MAX_PLAYERS = 8
+
+_HEADER = struct.Struct('<4sBBH8x')
+
+
+def _record_struct(players):
+    if players < 1 or players > MAX_PLAYERS:
+        raise ValueError(f'players must be between 1 and {MAX_PLAYERS}, not {players}')
+    return struct.Struct('<' + 'B' * (players * 2 + 5) + 'IB' * players + 'B')
+
+
+# Writes evaluated deals; can be used as a simulation sink
+class RecordWriter:
+    def __init__(self, path, players=2):
+        self.players = players
+        self._record = _record_struct(players)
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION, players, self._record.size))
+        self.count = 0
+
+    def consume(self, batch):
+        pack = self._record.pack
+        data = bytearray()
+        for deal, keys, winners in batch:
+            fields = list(deal)
+            for key in keys:
+                fields.append(key)
+                fields.append(key >> 20)
+            fields.append(sum(1 << (w - 1) for w in winners))
+            data += pack(*fields)
+        self._file.write(data)
+        self.count += len(batch)
+
+    def close(self):
+        self._file.close()
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Memory-maps a record file for reading.
+# The memoryviews and NumPy arrays handed out point straight into the
+# mapping: release them before calling close().
+class RecordReader:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise ValueError(f'{path} is not a record file: too short')
+
+        magic, version, players, record_size = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f'{path} is not a record file')
+        if version != VERSION:
+            self._mmap.close()
+            raise ValueError(f'{path} has record format version {version}, expected {VERSION}')
+
+        self.players = players
+        self._record = _record_struct(players)
+        if record_size != self._record.size:
+            self._mmap.close()
+            raise ValueError(f'{path} has records of {record_size} bytes, expected {self._record.size}')
+
+        self._count = (len(self._mmap) - _HEADER.size) // record_size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError('record index out of range')
+        offset = _HEADER.size + index * self._record.size
+        return self._decode(self._record.unpack_from(self._mmap, offset))
+
+    # zero-copy memoryviews over at most batch_size raw records each
+    def raw_batches(self, batch_size=10000):
+        size = self._record.size
+        view = memoryview(self._mmap)
+        try:
+            for start in range(0, self._count, batch_size):
+                end = min(start + batch_size, self._count)
+                yield view[_HEADER.size + start * size:_HEADER.size + end * size]
+        finally:
+            view.release()
+
+    # batches of evaluated deals (deal, keys, winners), decoded straight from
+    # the mapping; a replay source for simulation.Pipeline
+    def batches(self, batch_size=10000):
+        for raw in self.raw_batches(batch_size):
+            yield [self._decode(fields) for fields in self._record.iter_unpack(raw)]
+            raw.release()
+
+    def _decode(self, fields):
+        players = self.players
+        n = players * 2 + 5
+        keys = fields[n:n + players * 2:2]
+        mask = fields[-1]
+        winners = tuple(p + 1 for p in range(players) if mask >> p & 1)
+        return (fields[:n], keys, winners)
+
+    # NumPy dtype of one record
+    def dtype(self):
+        import numpy
+        fields = [('cards', 'u1', (self.players * 2 + 5,))]
+        for p in range(self.players):
+            fields.append((f'key{p + 1}', '<u4'))
+            fields.append((f'ranking{p + 1}', 'u1'))
+        fields.append(('winners', 'u1'))
+        return numpy.dtype(fields)
+
+    # all records as a read-only structured NumPy array on the mapping
+    def array(self):
+        try:
+            import numpy
+        except ImportError:
+            raise ImportError('RecordReader.array() needs numpy (pip install numpy)')
+        return numpy.frombuffer(self._mmap, dtype=self.dtype(), count=self._count, offset=_HEADER.size)
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# convenience: the records of a file, with the cards turned back into Cards
+def read_deals(path):
+    with RecordReader(path) as reader:
+        for batch in reader.batches():
+            for deal, keys, winners in batch:
+                yield [pkr.card_from_id(i) for i in deal], keys, winners
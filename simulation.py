@@ -0,0 +1,234 @@
+import collections
+import csv
+import multiprocessing
+import random
+
+import evaluator
+import tkpoker as pkr
+
+
+# A simulation is a Pipeline: a source yielding batches of deals, a chain of
+# stages transforming each batch, and sinks consuming the final batches.
+#
+# A deal is a tuple of card ids (see Card.id()): two hole cards per player,
+# followed by the five board cards.
+# An evaluated deal is a tuple (deal, keys, winners) with the strength key of
+# every player (see Holding.key()) and the tuple of winning player numbers
+# (more than one winner is a split pot).
+#
+# A stage is a callable taking a batch and returning the next one. A stage
+# may have a prepare() method, called once in this process before the first
+# batch, so worker processes forked after it share what it loaded.
+
+
+# deal source: yields lists of at most batch_size random deals
+def deal_batches(hands, batch_size=10000, players=2, seed=None):
+    rng = random.Random(seed)
+    deck = range(len(pkr.CARDS))
+    size = players * 2 + 5
+
+    while hands > 0:
+        n = min(batch_size, hands)
+        yield [tuple(rng.sample(deck, size)) for _ in range(n)]
+        hands -= n
+
+
+# player numbers (starting at 1) of the highest keys
+def get_winners(keys):
+    best = max(keys)
+    return tuple(p + 1 for p, key in enumerate(keys) if key == best)
+
+
+# evaluator stage: turns a batch of deals into a batch of evaluated deals
+class Evaluator:
+    def __init__(self, players=2):
+        self.players = players
+
+    # load the lookup tables of the evaluator
+    def prepare(self):
+        evaluator.TOP_RANKS.get()
+        evaluator.STRAIGHTS.get()
+
+    def __call__(self, batch):
+        evaluate = evaluator.evaluate
+        results = []
+        for deal in batch:
+            board = list(deal[-5:])
+            keys = [evaluate([deal[2*p], deal[2*p + 1]] + board) for p in range(self.players)]
+            results.append((deal, tuple(keys), get_winners(keys)))
+
+        return results
+
+
+# applies a chain of stages to one batch; picklable, so it can be sent to
+# worker processes
+class _Stages:
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def prepare(self):
+        for stage in self.stages:
+            if hasattr(stage, 'prepare'):
+                stage.prepare()
+
+    def __call__(self, batch):
+        for stage in self.stages:
+            batch = stage(batch)
+        return batch
+
+
+# Like pool.imap(function, items), but with at most in_flight items sent to
+# the workers and not taken back yet, so finished results don't pile up
+# when the caller is slower than the pool.
+def bounded_imap(pool, function, items, in_flight):
+    pending = collections.deque()
+    for item in items:
+        if len(pending) >= in_flight:
+            yield pending.popleft().get()
+        pending.append(pool.apply_async(function, (item,)))
+    while pending:
+        yield pending.popleft().get()
+
+
+class Pipeline:
+    def __init__(self, source, stages=(), sinks=()):
+        self.source = source
+        self.stages = list(stages)
+        self.sinks = list(sinks)
+
+    # Runs the pipeline until the source is exhausted and returns the result
+    # of every sink, in order.
+    # With processes > 1 the stages run in a pool of worker processes, while
+    # the source and the sinks stay in this process. Batches reach the sinks
+    # in source order either way.
+    # At most in_flight batches (default: 2 per process) are dealt or
+    # evaluated but not consumed yet, so slow sinks don't make the finished
+    # batches pile up in memory.
+    def run(self, processes=1, in_flight=None):
+        stages = _Stages(self.stages)
+        stages.prepare()
+
+        if processes > 1:
+            if in_flight is None:
+                in_flight = 2 * processes
+            with multiprocessing.Pool(processes) as pool:
+                for batch in bounded_imap(pool, stages, self.source, in_flight):
+                    self._consume(batch)
+        else:
+            for batch in self.source:
+                self._consume(stages(batch))
+
+        return [sink.close() for sink in self.sinks]
+
+    def _consume(self, batch):
+        for sink in self.sinks:
+            sink.consume(batch)
+
+
+# Sinks consume batches of evaluated deals and return their result on close()
+
+# discards everything, for timing the rest of the pipeline
+class NullSink:
+    def consume(self, batch):
+        pass
+
+    def close(self):
+        return None
+
+
+# number of wins per player number, None counts the split pots
+class WinCounter:
+    def __init__(self):
+        self.counts = dict()
+
+    def consume(self, batch):
+        counts = self.counts
+        for deal, keys, winners in batch:
+            win = winners[0] if len(winners) == 1 else None
+            counts[win] = counts.get(win, 0) + 1
+
+    def close(self):
+        return self.counts
+
+
+# number of wins per Hole_Cards.generic() class of the winner,
+# None counts the split pots
+class GenericHistogram:
+    def __init__(self):
+        self.counts = dict()
+        self._generics = dict()
+
+    def consume(self, batch):
+        counts = self.counts
+        for deal, keys, winners in batch:
+            if len(winners) == 1:
+                p = winners[0] - 1
+                win = self._generic(deal[2*p], deal[2*p + 1])
+            else:
+                win = None
+            counts[win] = counts.get(win, 0) + 1
+
+    # the 1326 possible hole cards map to only 169 classes: remember them
+    def _generic(self, a, b):
+        pair = (a, b) if a < b else (b, a)
+        generic = self._generics.get(pair)
+        if generic is None:
+            generic = pkr.Hole_Cards([pkr.CARDS[a], pkr.CARDS[b]]).generic()
+            self._generics[pair] = generic
+        return generic
+
+    def close(self):
+        return self.counts
+
+
+# writes one row per deal: the cards, the key of every player and the winners
+class CsvSink:
+    def __init__(self, path, players=2):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['cards'] + [f'key{p + 1}' for p in range(players)] + ['winners'])
+
+    def consume(self, batch):
+        cards = pkr.CARDS
+        self._writer.writerows(
+            [pkr.get_cards_string(cards[i] for i in deal)]
+            + list(keys)
+            + [' '.join(str(w) for w in winners)]
+            for deal, keys, winners in batch
+        )
+
+    def close(self):
+        self._file.close()
+        return None
+
+
+# writes one row per deal to a Parquet file, one row group per batch:
+# a column per card id, a column per player key and a bitmask of the winners.
+# Needs pyarrow.
+class ParquetSink:
+    def __init__(self, path, players=2):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('ParquetSink needs pyarrow (pip install pyarrow)')
+
+        self._pa = pyarrow
+        self._names = [f'card{i}' for i in range(players * 2 + 5)] \
+            + [f'key{p + 1}' for p in range(players)] + ['winners']
+        fields = [(name, pyarrow.uint8()) for name in self._names[:players * 2 + 5]] \
+            + [(name, pyarrow.uint32()) for name in self._names[players * 2 + 5:-1]] \
+            + [('winners', pyarrow.uint16())]
+        self._schema = pyarrow.schema(fields)
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def consume(self, batch):
+        if len(batch) == 0:
+            return
+        columns = [list(c) for c in zip(*(deal + keys for deal, keys, winners in batch))]
+        columns.append([sum(1 << (w - 1) for w in winners) for deal, keys, winners in batch])
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+        return None
@@ -0,0 +1,126 @@
+import evaluator
+import ranges
+import tkpoker as pkr
+
+
+# The strength of every two-card holding that is still live on a board,
+# relative to all the others.
+#
+#     table = StrengthTable(pkr.get_cards('[As][Kd][7c][7h][2s]'))
+#     table.nuts()                     the best holdings
+#     table.percentile(card1, card2)   how a holding ranks among all of them
+#
+# The board is analysed once; every holding only adds its two cards to a
+# copy of the board's rank counts and suit masks before it is evaluated
+# (see evaluator.evaluate_counts()). On a river that is 1081 holdings.
+
+
+class StrengthTable:
+    # board: 3 to 5 cards. dead: cards nobody can hold (e.g. your own hole
+    # cards). within: a ranges.Range to only look at part of the holdings.
+    def __init__(self, board, dead=(), within=None):
+        board = list(board)
+        if len(board) < 3 or len(board) > 5:
+            raise ValueError(f'a board has 3 to 5 cards, not {len(board)}')
+        self.board = board
+
+        counts = [0] * len(pkr.Rank)
+        suit_masks = [0] * len(pkr.Suit)
+        suit_counts = [0] * len(pkr.Suit)
+        for card in board:
+            r = card.rank.value - 1
+            s = card.suit.value - 1
+            counts[r] += 1
+            suit_masks[s] |= 1 << r
+            suit_counts[s] += 1
+
+        bits = ranges.ALL if within is None else within.bits
+        bits &= ~ranges.get_dead_bits(board + list(dead))
+
+        evaluate_counts = evaluator.evaluate_counts
+        n_ranks = len(pkr.Rank)
+        entries = []
+        for index in ranges.Range(bits).indices():
+            holding_counts = counts[:]
+            holding_masks = suit_masks[:]
+            holding_suits = suit_counts[:]
+            for card_id in ranges.COMBOS[index]:
+                r = card_id % n_ranks
+                s = card_id // n_ranks
+                holding_counts[r] += 1
+                holding_masks[s] |= 1 << r
+                holding_suits[s] += 1
+            entries.append((-evaluate_counts(holding_counts, holding_masks, holding_suits), index))
+        entries.sort()
+
+        # strongest first: (key, combo index)
+        self.entries = [(-key, index) for key, index in entries]
+
+        # holdings of equal strength, strongest group first: (key, [combo indices])
+        self.groups = []
+        for key, index in self.entries:
+            if self.groups and self.groups[-1][0] == key:
+                self.groups[-1][1].append(index)
+            else:
+                self.groups.append((key, [index]))
+
+        # per combo index: its key, its tie group and the number of weaker holdings
+        self._keys = dict()
+        self._groups = dict()
+        self._weaker = dict()
+        weaker = len(self.entries)
+        for group, (key, indices) in enumerate(self.groups):
+            weaker -= len(indices)
+            for index in indices:
+                self._keys[index] = key
+                self._groups[index] = group
+                self._weaker[index] = weaker
+
+        self.ranking_counts = dict((r, 0) for r in pkr.Ranking)
+        for key, indices in self.groups:
+            self.ranking_counts[pkr.get_key_ranking(key)] += len(indices)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _index(self, card1, card2):
+        index = ranges.get_combo_index(card1, card2)
+        if index not in self._keys:
+            raise KeyError(f'{card1.short()}{card2.short()} is not a live holding')
+        return index
+
+    # strength key of a holding (see Holding.key())
+    def key(self, card1, card2):
+        return self._keys[self._index(card1, card2)]
+
+    def ranking(self, card1, card2):
+        return pkr.get_key_ranking(self.key(card1, card2))
+
+    # Percentile rank of a holding, 0..1: the share of the holdings it beats,
+    # counting the ones it ties with (itself included) as half.
+    # The nuts without ties are 1 - 0.5/len(table).
+    def percentile(self, card1, card2):
+        index = self._index(card1, card2)
+        ties = len(self.groups[self._groups[index]][1])
+        return (self._weaker[index] + ties / 2) / len(self.entries)
+
+    # number of the tie group of a holding, 0 for the nuts
+    def group(self, card1, card2):
+        return self._groups[self._index(card1, card2)]
+
+    # number of holdings that beat a holding
+    def stronger(self, card1, card2):
+        index = self._index(card1, card2)
+        ties = len(self.groups[self._groups[index]][1])
+        return len(self.entries) - self._weaker[index] - ties
+
+    # the best holdings, as lists of 2 cards
+    def nuts(self):
+        if len(self.groups) == 0:
+            return []
+        return [ranges.get_combo(index) for index in self.groups[0][1]]
+
+    # all holdings as (cards, key), strongest first
+    def holdings(self):
+        return [(ranges.get_combo(index), key) for key, index in self.entries]
+
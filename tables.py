@@ -0,0 +1,177 @@
+import array
+import mmap
+import os
+import struct
+import sys
+
+
+# Lookup tables that are built on first use and cached on disk.
+#
+# A table is only built the first time its get() is called, never at import.
+# The result is written to a versioned file in the cache directory, so later
+# processes map it from disk in a few milliseconds instead of building it.
+# The mapping is read-only: workers forked after get() share its pages.
+#
+# The cache directory is $TKPOKER_CACHE, or ~/.cache/tkpoker.
+# Pre-warm the cache with:  python tables.py warm
+#
+# A table registers itself when its module is imported; warm() and clear()
+# work on the registered tables. The command line imports the modules given
+# with -m (default: evaluator) first.
+#
+# File layout: a 16 byte header (magic 'TKTB', table version (u32),
+# array typecode, byte order, item count (u32)), followed by the items.
+
+MAGIC = b'TKTB'
+
+_HEADER = struct.Struct('<4sIcc2xI')
+_BYTEORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+# every LazyTable by name
+TABLES = dict()
+
+
+def cache_dir():
+    path = os.environ.get('TKPOKER_CACHE')
+    if not path:
+        path = os.path.join(os.path.expanduser('~'), '.cache', 'tkpoker')
+    return path
+
+
+class LazyTable:
+    # builder() returns an iterable of the items, typecode is an array typecode.
+    # Bump the version whenever the builder changes its output.
+    def __init__(self, name, version, typecode, builder):
+        self.name = name
+        self.version = version
+        self.typecode = typecode
+        self.builder = builder
+        self._data = None
+        TABLES[name] = self
+
+    def path(self):
+        return os.path.join(cache_dir(), f'{self.name}-v{self.version}.tbl')
+
+    # the table as a read-only sequence of numbers
+    def get(self):
+        if self._data is None:
+            data = self._load()
+            if data is None:
+                data = self._build()
+            self._data = data
+        return self._data
+
+    def loaded(self):
+        return self._data is not None
+
+    # map the cached file, or None if it is missing or doesn't match
+    def _load(self):
+        try:
+            with open(self.path(), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        itemsize = array.array(self.typecode).itemsize
+        if len(mapped) >= _HEADER.size:
+            magic, version, typecode, byteorder, count = _HEADER.unpack_from(mapped)
+            if magic == MAGIC and version == self.version \
+                    and typecode == self.typecode.encode() and byteorder == _BYTEORDER \
+                    and len(mapped) == _HEADER.size + count * itemsize:
+                return memoryview(mapped)[_HEADER.size:].cast(self.typecode)
+
+        mapped.close()
+        return None
+
+    # build the table and cache it. If the cache can't be written, the built
+    # table is kept in memory only.
+    def _build(self):
+        data = array.array(self.typecode, self.builder())
+        path = self.path()
+        temp = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, self.version, self.typecode.encode(), _BYTEORDER, len(data)))
+                f.write(data.tobytes())
+            # atomic, so concurrent workers never see half a table
+            os.replace(temp, path)
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            return data
+
+        mapped = self._load()
+        if mapped is None:
+            return data
+        return mapped
+
+
+# Load or build the registered tables with the given names (all of them by
+# default). Raises ValueError for names that aren't registered.
+def warm(names=None):
+    if names is None:
+        names = list(TABLES)
+    unknown = [name for name in names if name not in TABLES]
+    if unknown:
+        raise ValueError(f'unknown tables: {", ".join(unknown)} (known: {", ".join(TABLES)})')
+    for name in names:
+        TABLES[name].get()
+
+
+# remove the cached files of every version of the registered tables
+def clear():
+    directory = cache_dir()
+    try:
+        files = os.listdir(directory)
+    except OSError:
+        return
+    for name in TABLES:
+        for file in files:
+            if file.startswith(name + '-v') and file.endswith('.tbl'):
+                os.remove(os.path.join(directory, file))
+
+
+def main(argv=None):
+    import argparse
+    import importlib
+
+    parser = argparse.ArgumentParser(prog='tables.py', description='Manage the cached tkpoker lookup tables.')
+    parser.add_argument('-m', '--module', action='append', dest='modules', metavar='MODULE',
+                        help='module defining tables, may be repeated (default: evaluator)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    warm_parser = commands.add_parser('warm', help='build and cache the tables')
+    warm_parser.add_argument('names', nargs='*', help='tables to warm (default: all)')
+    commands.add_parser('list', help='list the tables and their cache files')
+    commands.add_parser('clear', help='remove the cached tables')
+    args = parser.parse_args(argv)
+
+    # importing the modules registers their tables
+    for module in args.modules or ['evaluator']:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            parser.error(f"can't import {module}: {e}")
+
+    if args.command == 'warm':
+        try:
+            warm(args.names or None)
+        except ValueError as e:
+            parser.error(str(e))
+        for name in args.names or TABLES:
+            print(TABLES[name].path())
+    elif args.command == 'list':
+        for name, table in TABLES.items():
+            cached = 'cached' if os.path.exists(table.path()) else 'not cached'
+            print(f'{name} v{table.version}: {table.path()} ({cached})')
+    elif args.command == 'clear':
+        clear()
+
+
+if __name__ == "__main__":
+    # run main() on the importable module, not on __main__, so the tables
+    # register with the same registry
+    import tables
+    tables.main()
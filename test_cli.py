@@ -0,0 +1,55 @@
+import io
+
+import pytest
+
+import cli
+
+
+def run_cli(monkeypatch, capsys, argv, text):
+    monkeypatch.setattr('sys.stdin', io.StringIO(text))
+    cli.main(argv)
+    return capsys.readouterr().out
+
+
+def test_evaluate_three_pairs(monkeypatch, capsys):
+    out = run_cli(monkeypatch, capsys, ['evaluate'], 'KsKh7s7hQcQd\nAsAhKsKhQcQd2c\n\nXx\n')
+    lines = out.split('\n')
+    assert lines[:3] == [f'{0x3ddcc7} 3', f'{0x3eeddc} 3', '']
+    assert lines[3].startswith('ERROR ')
+    assert len(lines) == 5
+
+
+def test_showdown_three_pairs(monkeypatch, capsys):
+    out = run_cli(monkeypatch, capsys, ['showdown'], 'AsAhKsKh2c | 7c7d | 5c3d\n')
+    assert out.endswith(' 1\n')
+
+
+@pytest.mark.parametrize('option', ['--samples', '--exact'])
+def test_equity_rejects_counts_below_one(monkeypatch, capsys, option):
+    with pytest.raises(SystemExit):
+        run_cli(monkeypatch, capsys, ['equity', option, '0'], '| AsAd | KhKs\n')
+
+
+def test_equity_without_runouts(monkeypatch, capsys):
+    # 24 hands leave 4 cards for an empty board
+    cards = [f'{r}{s}' for r in 'AKQJT98765432' for s in 'shdc']
+    hands = ' | '.join(cards[2*i] + cards[2*i + 1] for i in range(24))
+    out = run_cli(monkeypatch, capsys, ['equity'], f'| {hands}\n| AsAd | KhKs\n')
+    lines = out.split('\n')
+    assert lines[0].startswith('ERROR ')
+    assert lines[1].startswith('0.8')
+
+
+def test_processes_match_serial_output(monkeypatch, capsys):
+    text = ''.join(f'{line}\n' for line in ['AsKsQsJsTs', 'Xx', '', '2c3d4h5s7c8d9h'] * 50)
+    serial = run_cli(monkeypatch, capsys, ['evaluate', '--batch-size', '7'], text)
+    parallel = run_cli(monkeypatch, capsys, ['evaluate', '--batch-size', '7', '-j', '3'], text)
+    assert parallel == serial
+    assert len(serial.split('\n')) == 201
+
+
+def test_missing_file(monkeypatch, capsys, tmp_path):
+    with pytest.raises(SystemExit) as exit:
+        run_cli(monkeypatch, capsys, ['evaluate', str(tmp_path / 'missing.txt')], '')
+    assert exit.value.code == 2
+    assert "can't open" in capsys.readouterr().err
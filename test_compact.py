@@ -0,0 +1,37 @@
+import pytest
+
+import tkpoker as pkr
+
+
+def defined(cards):
+    holding = pkr.Holding(pkr.get_cards(cards))
+    holding.define()
+    return holding
+
+
+def test_holding_compares_with_compact_holding():
+    aces = defined('AsAhKsKh2c3d4d')
+    queens = defined('QsQhKsKh2c3d4d')
+
+    assert aces == aces.compact() and aces.compact() == aces
+    assert not aces != aces.compact()
+    assert queens < aces.compact() and queens.compact() < aces
+    assert aces > queens.compact() and aces.compact() > queens
+
+    mixed = sorted([aces, queens.compact(), queens, aces.compact()])
+    assert [h.key() for h in mixed] == [queens.key()] * 2 + [aces.key()] * 2
+
+
+def test_compact_holding_does_not_compare_with_other_types():
+    compact = defined('AsAhKsKh2c3d4d').compact()
+    assert compact != 5
+    with pytest.raises(TypeError):
+        compact < 5
+
+
+def test_holding_array_round_trip():
+    holdings = [defined('AsAhKsKh2c3d4d'), defined('Ts9s8s7s6s2c3d'), defined('KsKh7s7hQcQd2d')]
+    array = pkr.Holding_Array(holdings)
+    for position, holding in enumerate(holdings):
+        assert array.key(position) == holding.key()
+        assert array.holding(position).pretty() == holding.pretty()
@@ -0,0 +1,42 @@
+import random
+
+import evaluator
+import tkpoker as pkr
+
+
+def holding_key(card_ids):
+    holding = pkr.Holding([pkr.CARDS[i] for i in card_ids])
+    holding.define()
+    return holding.key()
+
+
+def test_evaluate_matches_holding_key():
+    rng = random.Random(1)
+    for n in (5, 6, 7):
+        for i in range(3000):
+            hand = rng.sample(range(52), n)
+            assert evaluator.evaluate(hand) == holding_key(hand), pkr.get_cards_string(pkr.CARDS[i] for i in hand)
+
+
+def test_evaluate_matches_holding_key_on_few_ranks():
+    # only 4 ranks: lots of pairs, two pair, three pairs and full houses
+    rng = random.Random(2)
+    for n in (5, 6, 7):
+        for i in range(2000):
+            ranks = rng.sample(range(13), 4)
+            hand = rng.sample([s * 13 + r for s in range(4) for r in ranks], n)
+            assert evaluator.evaluate(hand) == holding_key(hand), pkr.get_cards_string(pkr.CARDS[i] for i in hand)
+
+
+def test_three_pairs():
+    hand = [c.id() for c in pkr.get_cards('KsKh7s7hQcQd')]
+    key = evaluator.evaluate(hand)
+    assert pkr.get_key_ranking(key) == pkr.Ranking.TWO_PAIR
+    assert key == holding_key(hand)
+    assert key & 0xfffff == 0xddcc7
+
+    # the third pair is a better kicker than the single card
+    hand = [c.id() for c in pkr.get_cards('AsAhKsKhQcQd2c')]
+    key = evaluator.evaluate(hand)
+    assert key == holding_key(hand)
+    assert key & 0xfffff == 0xeeddc
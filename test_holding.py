@@ -0,0 +1,25 @@
+import tkpoker as pkr
+
+
+def defined(cards):
+    holding = pkr.Holding(pkr.get_cards(cards))
+    holding.define()
+    return holding
+
+
+def test_third_pair_is_the_two_pair_kicker():
+    holding = defined('AsAhKsKhQcQd2c')
+    assert holding.ranking() == pkr.Ranking.TWO_PAIR
+    assert holding.pretty() == 'Two Pair, Aces and Kings, with a kicker Queen'
+    assert holding.key() == pkr.Ranking.TWO_PAIR.value << 20 | 0xeeddc
+
+    hand = pkr.get_two_pair(pkr.get_cards('AsAhKsKhQcQd2c'))
+    assert [card.rank for card in hand] == [pkr.Rank.ACE] * 2 + [pkr.Rank.KING] * 2 + [pkr.Rank.QUEEN]
+
+
+def test_three_pairs_of_six_cards():
+    # nothing but pairs: the lowest pair gives the kicker
+    holding = defined('KsKh7s7hQcQd')
+    assert holding.ranking() == pkr.Ranking.TWO_PAIR
+    assert holding.pretty() == 'Two Pair, Kings and Queens, with a kicker Seven'
+    assert holding.key() == pkr.Ranking.TWO_PAIR.value << 20 | 0xddcc7
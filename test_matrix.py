@@ -0,0 +1,84 @@
+import socket
+
+import pytest
+
+import matrix
+import tkpoker as pkr
+
+
+@pytest.fixture(scope='module')
+def units():
+    return matrix.get_units()
+
+
+def test_variant_weights_add_up_to_the_live_combos():
+    assert len(matrix.get_variants('[AKs]', '[AKo]')) == 1
+    assert matrix.get_variants('[AKs]', '[AKo]')[0][2] == 6
+
+    for generic1, generic2 in [('[AKs]', '[AKo]'), ('[AA]', '[AKs]'), ('[76s]', '[76s]'), ('[QJo]', '[JJ]'), ('[T9o]', '[52o]')]:
+        hero = [card.id() for card in pkr.get_generic_combos(generic1)[0]]
+        live = [combo for combo in pkr.get_generic_combos(generic2)
+                if combo[0].id() not in hero and combo[1].id() not in hero]
+        variants = matrix.get_variants(generic1, generic2)
+        assert sum(weight for hero_ids, villain, weight in variants) == len(live)
+
+
+def test_read_shard_repairs_a_partial_last_line(tmp_path):
+    path = tmp_path / 'shard-0000.csv'
+    good = '0,[As][Ad],[Ks][Kd],6,10,1,3\n2,[As][Ad],[Kh][Kd],6,9,2,3\n'
+    path.write_text(good + '5,[As][Ad],[Qs]')
+
+    assert matrix.read_shard(path) == {0: (6, 10, 1, 3), 2: (6, 9, 2, 3)}
+    assert path.read_text() == good + '5,[As][Ad],[Qs]'
+
+    assert matrix.read_shard(path, repair=True) == {0: (6, 10, 1, 3), 2: (6, 9, 2, 3)}
+    assert path.read_text() == good
+
+
+def test_merge(tmp_path, monkeypatch, units):
+    monkeypatch.setattr(matrix, 'get_units', lambda: units)
+    matrix.plan(tmp_path, 2)
+
+    # every unit: the first class wins 3 boards per combo of weight, ties 1, loses 0
+    for shard in range(2):
+        with open(tmp_path / f'shard-{shard:04d}.csv', 'w') as f:
+            for index, (i, j, hero, villain, weight) in matrix.get_shard_units(units, 2, shard):
+                f.write(f'{index},x,x,{weight},{3 * weight},{weight},0\n')
+
+    result = matrix.merge(tmp_path)
+    n = len(pkr.get_generic_classes())
+    for i in range(n):
+        assert result[i][i] == 0.5
+        for j in range(i + 1, n):
+            assert result[i][j] == pytest.approx(7 / 8)
+            assert result[j][i] == pytest.approx(1 / 8)
+
+
+def test_merge_needs_every_unit(tmp_path, monkeypatch, units):
+    monkeypatch.setattr(matrix, 'get_units', lambda: units)
+    matrix.plan(tmp_path, 2)
+    (tmp_path / 'shard-0000.csv').write_text('0,x,x,1,1,0,0\n')
+    with pytest.raises(ValueError):
+        matrix.merge(tmp_path)
+
+
+def test_claim(tmp_path):
+    host = socket.gethostname()
+    assert matrix.claim(tmp_path, 0)
+    assert matrix.claim(tmp_path, 0)
+
+    # a live process of this host, and a process on another host
+    (tmp_path / 'shard-0001.lock').write_text(f'{host} 1\n')
+    (tmp_path / 'shard-0002.lock').write_text('elsewhere 1\n')
+    assert not matrix.claim(tmp_path, 1)
+    assert not matrix.claim(tmp_path, 2)
+    assert matrix.claim(tmp_path, 2, resume=True)
+
+    # a dead process of this host
+    (tmp_path / 'shard-0003.lock').write_text(f'{host} 999999999\n')
+    assert matrix.claim(tmp_path, 3)
+
+    matrix.release(tmp_path, 0)
+    matrix.release(tmp_path, 1)
+    assert not (tmp_path / 'shard-0000.lock').exists()
+    assert (tmp_path / 'shard-0001.lock').exists()
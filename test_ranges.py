@@ -0,0 +1,15 @@
+import pytest
+
+import ranges
+
+
+def test_round_trip():
+    for text in ('TT+, AKs, KQo, A2s-A5s', 'AKs:0.5, AsKs, QQ:0.25, JJ, JhJd:0'):
+        parsed = ranges.parse_range(text)
+        assert ranges.parse_range(str(parsed)) == parsed
+
+
+@pytest.mark.parametrize('weight', ['nan', '-0.5', '2', 'inf'])
+def test_bad_weights(weight):
+    with pytest.raises(ValueError):
+        ranges.parse_range(f'AKs:{weight}')
@@ -0,0 +1,93 @@
+import pytest
+
+import records
+import simulation as sim
+
+
+# keeps every evaluated deal
+class ListSink:
+    def __init__(self):
+        self.deals = []
+
+    def consume(self, batch):
+        self.deals.extend(batch)
+
+    def close(self):
+        return self.deals
+
+
+@pytest.fixture
+def written(tmp_path):
+    path = tmp_path / 'deals.tkpr'
+    pipeline = sim.Pipeline(sim.deal_batches(1000, batch_size=300, seed=5), [sim.Evaluator()],
+                            [records.RecordWriter(path), ListSink(), sim.WinCounter()])
+    count, deals, wins = pipeline.run()
+    assert count == 1000
+    return path, deals, wins
+
+
+def test_round_trip(written):
+    path, deals, wins = written
+    assert path.stat().st_size == 16 + 20 * 1000
+    with records.RecordReader(path) as reader:
+        assert reader.players == 2
+        assert len(reader) == 1000
+        assert [deal for batch in reader.batches(300) for deal in batch] == deals
+    assert [(tuple(c.id() for c in cards), keys, winners) for cards, keys, winners in records.read_deals(path)] == deals
+
+
+def test_getitem(written):
+    path, deals, wins = written
+    with records.RecordReader(path) as reader:
+        assert reader[0] == deals[0]
+        assert reader[123] == deals[123]
+        assert reader[-1] == deals[-1]
+        assert reader[-1000] == deals[0]
+        with pytest.raises(IndexError):
+            reader[1000]
+        with pytest.raises(IndexError):
+            reader[-1001]
+
+
+def test_cut_short_file_loses_its_last_record(written):
+    path, deals, wins = written
+    data = path.read_bytes()
+    path.write_bytes(data[:-7])
+    with records.RecordReader(path) as reader:
+        assert len(reader) == 999
+        assert reader[-1] == deals[998]
+
+
+@pytest.mark.parametrize('offset, value', [(0, b'XXXX'), (4, b'\x02'), (6, b'\x15\x00')])
+def test_bad_header(written, offset, value):
+    path, deals, wins = written
+    data = bytearray(path.read_bytes())
+    data[offset:offset + len(value)] = value
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        records.RecordReader(path)
+
+
+def test_too_short(tmp_path):
+    path = tmp_path / 'short.tkpr'
+    path.write_bytes(b'TKPR')
+    with pytest.raises(ValueError):
+        records.RecordReader(path)
+
+
+def test_replay(written):
+    path, deals, wins = written
+    with records.RecordReader(path) as reader:
+        replayed, = sim.Pipeline(reader.batches(128), [], [sim.WinCounter()]).run()
+    assert replayed == wins
+
+
+def test_dtype(written):
+    pytest.importorskip('numpy')
+    path, deals, wins = written
+    with records.RecordReader(path) as reader:
+        assert reader.dtype().itemsize == 20
+        array = reader.array()
+        assert len(array) == 1000
+        assert int(array['key1'][0]) == deals[0][1][0]
+        del array
@@ -0,0 +1,47 @@
+import simulation as sim
+
+
+def run(tmp_path, name, processes, in_flight=None):
+    path = tmp_path / name
+    sinks = [sim.WinCounter(), sim.GenericHistogram(), sim.CsvSink(path)]
+    pipeline = sim.Pipeline(sim.deal_batches(5000, batch_size=300, seed=7), [sim.Evaluator()], sinks)
+    results = pipeline.run(processes=processes, in_flight=in_flight)
+    return results, path.read_text()
+
+
+def test_parallel_run_matches_serial_run(tmp_path):
+    serial = run(tmp_path, 'serial.csv', 1)
+    assert run(tmp_path, 'parallel.csv', 3) == serial
+    assert run(tmp_path, 'one_in_flight.csv', 2, in_flight=1) == serial
+    assert len(serial[1].splitlines()) == 5001
+
+
+# a stage marking the deals of its batches with whether it was prepared
+class Marker:
+    def __init__(self):
+        self.prepared = False
+
+    def prepare(self):
+        self.prepared = True
+
+    def __call__(self, batch):
+        return [(deal, self.prepared) for deal in batch]
+
+
+class ListSink:
+    def __init__(self):
+        self.items = []
+
+    def consume(self, batch):
+        self.items.extend(batch)
+
+    def close(self):
+        return self.items
+
+
+def test_stages_are_prepared_before_the_workers_start():
+    for processes in (1, 2):
+        pipeline = sim.Pipeline(sim.deal_batches(50, batch_size=10, seed=3), [Marker()], [ListSink()])
+        items, = pipeline.run(processes=processes)
+        assert len(items) == 50
+        assert all(prepared for deal, prepared in items)
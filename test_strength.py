@@ -0,0 +1,38 @@
+import strength
+import tkpoker as pkr
+
+
+def holding_key(cards, board):
+    holding = pkr.Holding(cards + board)
+    holding.define()
+    return holding.key()
+
+
+def test_keys_match_holding_on_paired_boards():
+    for board in ('KsKh7s7h', 'AsAhKsKh2c', 'Ts9s8s7c7d'):
+        board = pkr.get_cards(board)
+        table = strength.StrengthTable(board)
+        for cards, key in table.holdings():
+            assert key == holding_key(cards, board)
+
+
+def test_double_paired_turn():
+    table = strength.StrengthTable(pkr.get_cards('KsKh7s7h'))
+    queens = pkr.get_cards('QcQd')
+    ace = pkr.get_cards('Ac2d')
+
+    assert table.ranking(*queens) == pkr.Ranking.TWO_PAIR
+    assert table.percentile(*queens) > table.percentile(*ace)
+    assert table.stronger(*queens) < table.stronger(*ace)
+
+
+def test_double_paired_river():
+    table = strength.StrengthTable(pkr.get_cards('AsAhKsKh2c'))
+    queens = pkr.get_cards('QcQd')
+    queen = pkr.get_cards('Qc3d')
+
+    # both play Aces and Kings with a Queen kicker
+    assert table.key(*queens) == table.key(*queen)
+    assert table.percentile(*queens) == table.percentile(*queen)
+    assert table.stronger(*queens) == table.stronger(*queen)
+    assert table.percentile(*queens) > table.percentile(*pkr.get_cards('Jc3d'))
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import tables
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('TKPOKER_CACHE', str(tmp_path))
+    # tables made here stay out of the registry of the real ones
+    monkeypatch.setattr(tables, 'TABLES', dict())
+    return tmp_path
+
+
+# a builder counting its calls
+class Builder:
+    def __init__(self, items):
+        self.items = items
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return iter(self.items)
+
+
+def test_first_get_builds_and_writes(cache):
+    builder = Builder([3, 1, 4, 1, 5])
+    table = tables.LazyTable('test', 1, 'I', builder)
+    assert not table.loaded()
+    assert builder.calls == 0
+
+    assert list(table.get()) == [3, 1, 4, 1, 5]
+    assert builder.calls == 1
+    assert (cache / 'test-v1.tbl').stat().st_size == 16 + 5 * 4
+
+    table.get()
+    assert builder.calls == 1
+
+
+def test_second_table_maps_the_cache(cache):
+    tables.LazyTable('test', 1, 'I', Builder([3, 1, 4])).get()
+
+    builder = Builder([])
+    data = tables.LazyTable('test', 1, 'I', builder).get()
+    assert isinstance(data, memoryview)
+    assert data.readonly
+    assert list(data) == [3, 1, 4]
+    assert builder.calls == 0
+
+
+def test_version_mismatch_rebuilds(cache):
+    tables.LazyTable('test', 1, 'I', Builder([3, 1, 4])).get()
+    os.rename(cache / 'test-v1.tbl', cache / 'test-v2.tbl')
+
+    builder = Builder([2, 7])
+    assert list(tables.LazyTable('test', 2, 'I', builder).get()) == [2, 7]
+    assert builder.calls == 1
+
+
+def test_size_mismatch_rebuilds(cache):
+    tables.LazyTable('test', 1, 'I', Builder([3, 1, 4])).get()
+    path = cache / 'test-v1.tbl'
+    path.write_bytes(path.read_bytes()[:-2])
+
+    builder = Builder([3, 1, 4])
+    assert list(tables.LazyTable('test', 1, 'I', builder).get()) == [3, 1, 4]
+    assert builder.calls == 1
+    assert path.stat().st_size == 16 + 3 * 4
+
+
+def test_unwritable_cache_keeps_the_table_in_memory(cache, monkeypatch):
+    # a file where the cache directory should be
+    blocked = cache / 'blocked'
+    blocked.write_text('')
+    monkeypatch.setenv('TKPOKER_CACHE', str(blocked / 'tables'))
+
+    builder = Builder([3, 1, 4])
+    table = tables.LazyTable('test', 1, 'I', builder)
+    assert list(table.get()) == [3, 1, 4]
+    assert builder.calls == 1
+    assert not isinstance(table.get(), memoryview)
+
+
+def test_warm(cache, capsys):
+    builder = Builder([3, 1, 4])
+    tables.LazyTable('test', 1, 'I', builder)
+    with pytest.raises(ValueError):
+        tables.warm(['test', 'nope'])
+    assert builder.calls == 0
+
+    tables.warm()
+    assert builder.calls == 1
+
+    with pytest.raises(SystemExit):
+        tables.main(['warm', 'nope'])
+    assert 'unknown tables: nope' in capsys.readouterr().err
@@ -1,3 +1,4 @@
+import array
 import random
 from enum import Enum, unique
 
@@ -41,6 +42,13 @@ class Rank(Enum):
         else:
             return str(self.name)[:1]
 
+    # value with the ace playing high (2..14)
+    def high(self):
+        if self == Rank.ACE:
+            return 14
+        else:
+            return self.value
+
 
 class Card:
     def __init__(self, rank, suit):
@@ -96,6 +104,10 @@ class Card:
     def short(self):
         return str('[' + self.rank.short() + self.suit.short() + ']')
 
+    # position of the card in a fresh (unshuffled) Deck, 0..51
+    def id(self):
+        return (self.suit.value - 1) * len(Rank) + self.rank.value - 1
+
 
 class Deck:
     def __init__(self):
@@ -114,6 +126,14 @@ class Deck:
         return self._cards.pop(0)
 
 
+# one shared Card instance per card id, so batches of ids can be turned
+# back into cards without creating new objects
+CARDS = tuple(Card(rank, suit) for suit in Suit for rank in Rank)
+
+def card_from_id(card_id):
+    return CARDS[card_id]
+
+
 @unique
 class Ranking(Enum):
     HIGH_CARD = 1
@@ -151,6 +171,10 @@ class Ranking(Enum):
     def __ge__(self, other):
         return self.value >= other.value
 
+    # needed next to __eq__, so a Ranking can be a dictionary key
+    def __hash__(self):
+        return hash(self.value)
+
     def __str__(self):
         return str(self.name).replace('_',' ').title()
 
@@ -185,6 +209,52 @@ class Hole_Cards:
             return generic_string
 
 
+# the Rank of a Rank.short() character ('A', 'K', ..., 'T', '9', ..., '2')
+def get_rank(short):
+    for r in Rank:
+        if r.short() == short.upper():
+            return r
+    raise ValueError(f'not a rank: {short!r}')
+
+# the Suit of a Suit.short() character ('s', 'h', 'c' or 'd')
+def get_suit(short):
+    for s in Suit:
+        if s.short() == short.lower():
+            return s
+    raise ValueError(f'not a suit: {short!r}')
+
+# all 169 Hole_Cards.generic() strings, in the order of the usual 13x13 grid:
+# pairs on the diagonal, suited hands above it and offsuit hands below it
+def get_generic_classes():
+    ranks = sorted(Rank, key=Rank.high, reverse=True)
+    generics = []
+    for row in ranks:
+        for column in ranks:
+            if row == column:
+                generics.append('[' + row.short() + column.short() + ']')
+            elif row.high() > column.high():
+                generics.append('[' + row.short() + column.short() + 's]')
+            else:
+                generics.append('[' + column.short() + row.short() + 'o]')
+    return generics
+
+# all hole cards (as lists of 2 cards, highest first) of a generic string
+def get_generic_combos(generic):
+    high = get_rank(generic[1])
+    low = get_rank(generic[2])
+    suits = list(Suit)
+
+    combos = []
+    if high == low:
+        for i in range(len(suits)):
+            for j in range(i + 1, len(suits)):
+                combos.append([CARDS[Card(high, suits[i]).id()], CARDS[Card(low, suits[j]).id()]])
+    else:
+        for s1 in suits:
+            for s2 in suits:
+                if (s1 == s2) == (generic[3] == 's'):
+                    combos.append([CARDS[Card(high, s1).id()], CARDS[Card(low, s2).id()]])
+    return combos
 
 
 class Holding:
@@ -193,7 +263,7 @@ class Holding:
         self._pretty = ''
 
     def define(self):
-        cards = list(self._cards)
+        cards = HandAnalysis(self._cards)
 
         hand = get_royal_flush(cards)
         if hand != None:
@@ -289,8 +359,26 @@ class Holding:
     def pretty(self):
         return self._pretty
 
+    def ranking(self):
+        return self._ranking
+
+    # integer strength key: the Ranking in the high bits, followed by the
+    # (ace high) rank of each card of the hand, 4 bits each.
+    # Keys compare exactly like the Holdings they were made from.
+    def key(self):
+        key = self._ranking.value
+        for card in self._hand:
+            key = (key << 4) | card.rank.high()
+        return key
+
+    # the Holding as a Compact_Holding: only the key and the five best cards
+    def compact(self):
+        return Compact_Holding(self.key(), _pack_ids(card.id() for card in self._hand))
+
     # self == other
     def __eq__(self, other):
+        if isinstance(other, Compact_Holding):
+            return self.key() == other.key()
         if self._ranking != other._ranking:
             return False
         else:
@@ -302,6 +390,8 @@ class Holding:
     
     # self != other
     def __ne__(self, other):
+        if isinstance(other, Compact_Holding):
+            return self.key() != other.key()
         if self._ranking != other._ranking:
             return True
         else:
@@ -313,6 +403,8 @@ class Holding:
 
     # self < other
     def __lt__(self, other):
+        if isinstance(other, Compact_Holding):
+            return self.key() < other.key()
         if self._ranking < other._ranking:
             return True
         elif self._ranking > other._ranking:
@@ -328,6 +420,8 @@ class Holding:
 
     # self > other
     def __gt__(self, other):
+        if isinstance(other, Compact_Holding):
+            return self.key() > other.key()
         if self._ranking > other._ranking:
             return True
         elif self._ranking < other._ranking:
@@ -342,9 +436,201 @@ class Holding:
             return False
 
 
+# five card ids of 6 bits each in one int, the first card in the lowest bits
+def _pack_ids(card_ids):
+    packed = 0
+    for i, card_id in enumerate(card_ids):
+        packed |= card_id << (6 * i)
+    return packed
+
+def _unpack_ids(packed):
+    return [(packed >> (6 * i)) & 63 for i in range(5)]
+
+
+# An evaluated hand that only keeps its strength key (which holds the
+# Ranking, see Holding.key()) and the ids of its five best cards, packed
+# in a single int. Compares like the Holding it was made from.
+class Compact_Holding:
+    __slots__ = ('_key', '_cards')
+
+    def __init__(self, key, cards):
+        self._key = key
+        self._cards = cards
+
+    def key(self):
+        return self._key
+
+    def ranking(self):
+        return get_key_ranking(self._key)
+
+    # the five best cards, in the order of the Holding
+    def hand(self):
+        return [CARDS[card_id] for card_id in _unpack_ids(self._cards)]
+
+    # The full Holding of the five best cards, defined.
+    # Its ranking, hand and key are those of the original Holding.
+    def holding(self):
+        holding = Holding(self.hand())
+        holding.define()
+        return holding
+
+    def pretty(self):
+        return self.holding().pretty()
+
+    # self == other
+    def __eq__(self, other):
+        key = _get_other_key(other)
+        if key is None:
+            return NotImplemented
+        return self._key == key
+
+    # self != other
+    def __ne__(self, other):
+        key = _get_other_key(other)
+        if key is None:
+            return NotImplemented
+        return self._key != key
+
+    # self < other
+    def __lt__(self, other):
+        key = _get_other_key(other)
+        if key is None:
+            return NotImplemented
+        return self._key < key
+
+    # self <= other
+    def __le__(self, other):
+        key = _get_other_key(other)
+        if key is None:
+            return NotImplemented
+        return self._key <= key
+
+    # self > other
+    def __gt__(self, other):
+        key = _get_other_key(other)
+        if key is None:
+            return NotImplemented
+        return self._key > key
+
+    # self >= other
+    def __ge__(self, other):
+        key = _get_other_key(other)
+        if key is None:
+            return NotImplemented
+        return self._key >= key
+
+    def __hash__(self):
+        return hash(self._key)
+
+
+# the strength key of anything with a key() (a Holding or a Compact_Holding),
+# or None to let the comparison be NotImplemented
+def _get_other_key(other):
+    key = getattr(other, 'key', None)
+    if not callable(key):
+        return None
+    return key()
+
+
+# Many Compact_Holdings in two flat arrays, a strength key of 4 bytes and
+# five card ids of 1 byte per hand: 9 bytes per hand, and no object per hand
+# until one is asked for.
+class Holding_Array:
+    def __init__(self, holdings=()):
+        self._keys = array.array('I')
+        self._cards = bytearray()
+        self.extend(holdings)
+
+    def __len__(self):
+        return len(self._keys)
+
+    # append a Holding (defined) or a Compact_Holding
+    def append(self, holding):
+        if isinstance(holding, Holding):
+            holding = holding.compact()
+        self._keys.append(holding.key())
+        self._cards += bytes(_unpack_ids(holding._cards))
+
+    def extend(self, holdings):
+        for holding in holdings:
+            self.append(holding)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self._keys)
+        if position < 0 or position >= len(self._keys):
+            raise IndexError('Holding_Array index out of range')
+        return Compact_Holding(self._keys[position], _pack_ids(self._cards[5 * position:5 * position + 5]))
+
+    def __iter__(self):
+        for position in range(len(self._keys)):
+            yield self[position]
+
+    # all strength keys, without creating any Compact_Holding
+    def keys(self):
+        return self._keys
+
+    def key(self, position):
+        return self._keys[position]
+
+    def ranking(self, position):
+        return get_key_ranking(self._keys[position])
+
+    def holding(self, position):
+        return self[position].holding()
+
+
+
+# Everything the get_* functions need to know about a set of cards, worked
+# out in a single pass over the cards.
+# Every get_* function accepts a HandAnalysis in place of the cards, so the
+# same cards only have to be analysed once (see Holding.define()).
+class HandAnalysis:
+    def __init__(self, cards):
+        try:
+            cards = list(cards)
+        except TypeError:
+            cards = [cards]
+
+        self.cards = cards
+        self.rank_counts = [0] * len(Rank)      # index: Rank.value - 1
+        self.suit_counts = [0] * len(Suit)      # index: Suit.value - 1
+        self.rank_mask = 0                      # bit Rank.value - 1 per rank present
+        self.suit_masks = [0] * len(Suit)       # rank_mask of every suit
+
+        rank_cards = [[] for r in Rank]
+        suit_cards = [[] for s in Suit]
+        for card in cards:
+            r = card.rank.value - 1
+            s = card.suit.value - 1
+            rank_cards[r].append(card)
+            suit_cards[s].append(card)
+            self.rank_counts[r] += 1
+            self.suit_counts[s] += 1
+            self.rank_mask |= 1 << r
+            self.suit_masks[s] |= 1 << r
+
+        # Rank as Key, and a list of the cards of that Rank as Value,
+        # like get_by_rank(). Don't modify the lists!
+        self.by_rank = dict()
+        for r in Rank:
+            if rank_cards[r.value - 1]:
+                self.by_rank[r] = rank_cards[r.value - 1]
+
+        # Suit as Key, and a list of the cards of that Suit as Value
+        self.by_suit = dict()
+        for s in Suit:
+            self.by_suit[s] = suit_cards[s.value - 1]
+
+
+def _analyse(cards):
+    if isinstance(cards, HandAnalysis):
+        return cards
+    else:
+        return HandAnalysis(cards)
+
 
 def get_royal_flush(cards):
-    cards = list(cards)
     royal_flush = get_straight_flush(cards)
     if royal_flush != None:
         royal_flush.sort()
@@ -358,14 +644,12 @@ def get_royal_flush(cards):
 
 
 def get_straight_flush(cards):
-    cards = list(cards)
     flushcards = get_flushcards(cards)
     straight_flush = get_straightcards(flushcards)
     return straight_flush
 
 
 def get_flush(cards):
-    cards = list(cards)
     flush = get_flushcards(cards)
     if flush != None:
         flush.sort(key=None, reverse=True)
@@ -377,81 +661,37 @@ def get_flush(cards):
 
 # get all the cards of the same suit, if there are 5 or more
 def get_flushcards(cards):
-    cards_per_suit = dict([
-        (Suit.SPADES, []),
-        (Suit.HEARTS, []),
-        (Suit.CLUBS, []),
-        (Suit.DIAMONDS, [])
-    ])
-    for card in cards:
-        cards_per_suit[card.suit].append(card)
-
-    flush = []
-    for s in cards_per_suit:
-        suited_cards = cards_per_suit[s]
-
-        if len(suited_cards) >= 5:
-            flush = suited_cards
-
-    if len(flush) >= 5:
-        return flush
-    else:
-        return None
+    analysis = _analyse(cards)
+
+    flush = None
+    for s in Suit:
+        if analysis.suit_counts[s.value - 1] >= 5:
+            flush = list(analysis.by_suit[s])
+
+    return flush
 
 # get the highest straight out of the cards, or None if there is no straight
 def get_straightcards(cards):
-    straight = []
-
     if cards is None:
         return None
 
-    cards = list(cards)
-    ranks = get_by_rank(cards)
-    
-    # get all single unique cards
-    uniques = []
-    for r in ranks:
-        uniques.append(ranks[r][0])
-    
-    # can't be straight, if there's less than 5 cards
-    if len(uniques) < 5:
-        return None
-
-    # sort the uniques from low to high 
-    # (careful later on: Ace can be high or low!)
-    uniques.sort()
-
-    ace = False
-    if uniques[-1].rank == Rank.ACE:
-        ace = True
-
-    # check ace-high straight
-    if ace:
-        if uniques[-2].rank == Rank.KING and \
-            uniques[-3].rank == Rank.QUEEN and \
-            uniques[-4].rank == Rank.JACK and \
-            uniques[-5].rank == Rank.TEN:
-                straight.append(uniques[-1])
-                straight.append(uniques[-2])
-                straight.append(uniques[-3])
-                straight.append(uniques[-4])
-                straight.append(uniques[-5])
-                return straight
-        # no ace-high straight, so let the ace be low: 
-        # the uniques list is sorted and we move the ace to the front
-        else:
-            a = uniques[-1]
-            uniques.insert(0,a)
-            del uniques[-1]
-
-    n = len(uniques)
-    for i in range(n-1, 3, -1):
-        if uniques[i].rank.value - uniques[i-4].rank.value == 4:
-            straight.append(uniques[i])
-            straight.append(uniques[i-1])
-            straight.append(uniques[i-2])
-            straight.append(uniques[i-3])
-            straight.append(uniques[i-4])
+    analysis = _analyse(cards)
+    ranks = analysis.by_rank
+
+    # bit 0 is the Ace (low) up to bit 12, the King.
+    # Copy the Ace to bit 13, so it can be high as well.
+    mask = analysis.rank_mask | (analysis.rank_mask & 1) << 13
+
+    # try the highest straight first: Ace-high down to Five-high
+    for high in range(14, 4, -1):
+        window = 0b11111 << (high - 5)
+        if mask & window == window:
+            straight = []
+            for value in range(high, high - 5, -1):
+                if value == 14:
+                    straight.append(ranks[Rank.ACE][0])
+                else:
+                    straight.append(ranks[Rank(value)][0])
             return straight
     
     return None
@@ -460,8 +700,7 @@ def get_straightcards(cards):
 # None is returned if not four of a kind.
 def get_four_of_a_kind(cards):
     hand = []
-    cards = list(cards)
-    ranks = get_by_rank(cards)
+    ranks = _analyse(cards).by_rank
     
     kicker = None
     for r in ranks:
@@ -483,8 +722,8 @@ def get_four_of_a_kind(cards):
 
 # get a full house from cards, or None if not full house.
 def get_full_house(cards):
-    cards = list(cards)
-    tripple = get_three_of_a_kind(cards)
+    analysis = _analyse(cards)
+    tripple = get_three_of_a_kind(analysis)
     if tripple != None:
 
         # special check: if it is already a full house!  
@@ -497,7 +736,7 @@ def get_full_house(cards):
     else:
         return None
 
-    pair = get_highest_pair(cards)
+    pair = get_highest_pair(analysis)
     full_house = []
     if pair != None:
         for card in tripple:
@@ -512,8 +751,8 @@ def get_full_house(cards):
 # get Three of a Kind, plus kickers.
 # Warning: If you want to assume kickers are correct, make sure that input cards are not Full House!!!
 def get_three_of_a_kind(cards):
-    cards = list(cards)
-    ranks = get_by_rank(cards)
+    analysis = _analyse(cards)
+    ranks = analysis.by_rank
 
     best = []
     second_best = []
@@ -522,11 +761,11 @@ def get_three_of_a_kind(cards):
     for r in ranks:
         if len(ranks[r]) == 3:
             if len(best) == 0:
-                best = ranks[r]
+                best = list(ranks[r])
             elif len(best) == 3:
                 if ranks[r][0] > best[0]:
                     second_best = best
-                    best = ranks[r]
+                    best = list(ranks[r])
                 else:
                     second_best = ranks[r]
         
@@ -545,9 +784,8 @@ def get_three_of_a_kind(cards):
             best.append(second_best[1])
             return best
         else:
-            for card in best:
-                cards.remove(card)
-            pair = get_highest_pair(cards)
+            # the three of a kind is no pair, so this is the highest pair besides it
+            pair = get_highest_pair(analysis)
             best.append(pair[0])
             best.append(pair[1])
             return best
@@ -560,26 +798,20 @@ def get_three_of_a_kind(cards):
         return None
 
 def get_two_pair(cards):
-    cards = list(cards)
-    high_pair = get_highest_pair(cards)
+    ranks = _analyse(cards).by_rank
+    high_pair = _get_highest_pair(ranks)
 
-    if high_pair != None:
-        for c in high_pair:
-            cards.remove(c)
-    else:
+    if high_pair == None:
         return None
 
-    low_pair = get_highest_pair(cards)
-    if low_pair != None:
-        for c in low_pair:
-            cards.remove(c)
-    else:
+    low_pair = _get_highest_pair(ranks, high_pair[0].rank)
+    if low_pair == None:
         return None
 
+    # any other rank can be the kicker, a third pair as well
     kickers = []
-    ranks = get_by_rank(cards)
     for r in ranks:
-        if len(ranks[r]) == 1:
+        if r != high_pair[0].rank and r != low_pair[0].rank:
             kickers.append(ranks[r][0])
 
     hand = []
@@ -598,14 +830,12 @@ def get_two_pair(cards):
 # get the pair and 3 kickers from the cards.
 # Warning: Assume it is known the cards are not two pair.
 def get_pair(cards):
-    cards = list(cards)
-    pair = get_highest_pair(cards)
+    ranks = _analyse(cards).by_rank
+    pair = _get_highest_pair(ranks)
      
     kickers = []
     if pair != None:
-        cards.remove(pair[0])
-        cards.remove(pair[1])
-        ranks = get_by_rank(cards)
+        pair = list(pair)
         for r in ranks:
             if len(ranks[r]) == 1:
                 kickers.append(ranks[r][0])
@@ -619,8 +849,7 @@ def get_pair(cards):
             return None
 
 def get_high_card(cards):
-    cards = list(cards)
-    ranks = get_by_rank(cards)
+    ranks = _analyse(cards).by_rank
     hand = []
     
     for r in ranks:
@@ -638,43 +867,28 @@ def get_high_card(cards):
 
 # returns a dictionary with Rank as Key, and a list of all cards of that Rank as Value
 def get_by_rank(cards):
-    try:
-        cards = list(cards)
-    except:
-        cards = [cards]
-
-    cards.sort()
     ranks = dict()
-
-    # Create dictionary with all ranks as keys
-    for r in Rank:
-        ranks[r]=[]
-
-    # Add cards to the dictionary
-    for card in cards:
-        ranks[card.rank].append(card)
-
-    # Remove empty dictionary entries
-    for r in Rank:
-        if len(ranks[r]) == 0:
-            del ranks[r]
+    for r, rank_cards in _analyse(cards).by_rank.items():
+        ranks[r] = list(rank_cards)
 
     return ranks
 
 
 # get the highest pair from the cards
 def get_highest_pair(cards):
+    pair = _get_highest_pair(_analyse(cards).by_rank)
+    if pair != None:
+        return list(pair)
+    else:
+        return None
 
-    try:
-        cards = list(cards)
-    except:
-        pass
-
-    ranks = get_by_rank(cards)
+# the highest pair in a get_by_rank() dictionary, skipping Rank exclude.
+# Returns the list from the dictionary itself, so don't modify it!
+def _get_highest_pair(ranks, exclude=None):
     best = []
 
     for r in ranks:
-        if len(ranks[r]) == 2:
+        if len(ranks[r]) == 2 and r != exclude:
             if len(best) == 0:
                 best = ranks[r]
             else:
@@ -686,6 +900,25 @@ def get_highest_pair(cards):
     else:
         return None
 
+# the Ranking stored in a strength key (see Holding.key())
+def get_key_ranking(key):
+    return Ranking(key >> 20)
+
+# the Card of a Card.short() string, with or without the brackets: '[As]' or 'As'
+def get_card(string):
+    string = string.strip().strip('[]')
+    if len(string) != 2:
+        raise ValueError(f'not a card: {string!r}')
+    return CARDS[Card(get_rank(string[0]), get_suit(string[1])).id()]
+
+# the cards of a string like get_cards_string() makes, e.g. '[As][Kd]'.
+# The brackets are optional, and spaces are ignored: 'AsKd' and 'As Kd' work too.
+def get_cards(string):
+    string = ''.join(string.replace('[', '').replace(']', '').split())
+    if len(string) % 2 != 0:
+        raise ValueError(f'not a list of cards: {string!r}')
+    return [get_card(string[i:i+2]) for i in range(0, len(string), 2)]
+
 def get_cards_string(cards, sorted=False):
     cards = list(cards)
     if sorted: